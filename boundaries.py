@@ -9,18 +9,26 @@ This module provides a unified interface for mocking:
 - Other external system boundaries
 """
 
+from __future__ import annotations
+
 import os
 import json
+import atexit
+import shutil
 from pathlib import Path
-from typing import Any, Protocol
-from tempfile import TemporaryDirectory
-from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Protocol
+from itertools import count
+from tempfile import mkdtemp
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass, field
+from functools import cache, cached_property
 from urllib.parse import urlencode
 
-import respx
-from httpx import Response
-from starlette.requests import Request
+# respx, httpx and starlette are imported where used so that tests needing
+# only the filesystem or env mocks do not pay for loading them
+if TYPE_CHECKING:
+    from httpx import Response
+    from starlette.requests import Request
 
 
 # ==============================================================================
@@ -28,9 +36,16 @@ from starlette.requests import Request
 # ==============================================================================
 
 
-@dataclass
+@dataclass(frozen=True)
 class MockHttpResponse:
-    """Represents a mocked HTTP response."""
+    """
+    Represents a mocked HTTP response.
+
+    Instances are frozen so the converted httpx Response can be built once
+    and shared by every route the mock is registered against. Freezing is
+    shallow: mutating json_data after the response has been registered is
+    not picked up by the cached httpx_response.
+    """
 
     status_code: int = 200
     json_data: dict[str, Any] | None = None
@@ -38,15 +53,28 @@ class MockHttpResponse:
     headers: dict[str, str] = field(default_factory=dict)
     content_type: str | None = None
 
+    def __post_init__(self):
+        # Own a copy so later changes to the caller's dict cannot leak in
+        object.__setattr__(self, "headers", dict(self.headers))
+
+    @cached_property
+    def httpx_response(self) -> Response:
+        """Cached httpx Response, built on first access."""
+        return self.to_httpx_response()
+
     def to_httpx_response(self) -> Response:
         """Convert to httpx Response object."""
-        headers = self.headers.copy()
+        from httpx import Response
+
+        # httpx takes a list of pairs as-is, so skip building a dict copy
+        headers = list(self.headers.items())
 
         if self.content_type:
-            headers["content-type"] = self.content_type
+            headers = [item for item in headers if item[0] != "content-type"]
+            headers.append(("content-type", self.content_type))
 
         if self.json_data is not None:
-            headers.setdefault("content-type", "application/json")
+            # httpx defaults content-type to application/json for json=
             return Response(self.status_code, json=self.json_data, headers=headers)
         elif self.text_data is not None:
             return Response(self.status_code, text=self.text_data, headers=headers)
@@ -54,6 +82,11 @@ class MockHttpResponse:
             return Response(self.status_code, headers=headers)
 
 
+_JSON_CT = b"application/json"
+_FORM_CT = b"application/x-www-form-urlencoded"
+_TEXT_CT = b"text/plain"
+
+
 class MockState:
     """Mock request state object for adding state attributes."""
 
@@ -86,19 +119,21 @@ def mock_request(
     Returns:
         Real Starlette Request object
     """
+    from starlette.requests import Request
+
     # Determine content type and body based on data provided
     if json_data is not None:
         # JSON request
         body = json.dumps(json_data).encode("utf-8")
-        content_type = b"application/json"
+        content_type = _JSON_CT
     elif form_data is not None:
         # Form request
         body = urlencode(form_data).encode("utf-8")
-        content_type = b"application/x-www-form-urlencoded"
+        content_type = _FORM_CT
     else:
         # Empty request
         body = b""
-        content_type = b"text/plain"
+        content_type = _TEXT_CT
 
     # Handle query parameters
     query_string = b""
@@ -113,7 +148,7 @@ def mock_request(
         "query_string": query_string,
         "headers": [
             (b"content-type", content_type),
-            (b"content-length", str(len(body)).encode()),
+            (b"content-length", b"%d" % len(body)),
         ],
     }
 
@@ -152,27 +187,53 @@ class HttpMocker(Protocol):
         """Mock any HTTP method."""
         ...
 
+    def mock_many(self, urls: list[str], response: MockHttpResponse) -> None:
+        """Mock any HTTP method on several URLs sharing one response."""
+        ...
 
-@contextmanager
-def mock_http():
-    """Context manager for mocking HTTP requests."""
 
-    class HttpMockerImpl:
-        def __init__(self, respx_mock):
-            self.respx_mock = respx_mock
+class HttpMockerImpl:
+    """HttpMocker backed by a respx router."""
 
-        def mock_get(self, url: str, response: MockHttpResponse) -> None:
-            self.respx_mock.get(url).mock(return_value=response.to_httpx_response())
+    __slots__ = ("respx_mock",)
 
-        def mock_post(self, url: str, response: MockHttpResponse) -> None:
-            self.respx_mock.post(url).mock(return_value=response.to_httpx_response())
+    def __init__(self, respx_mock):
+        self.respx_mock = respx_mock
 
-        def mock_any(self, url: str, response: MockHttpResponse) -> None:
-            self.respx_mock.route(url=url).mock(
-                return_value=response.to_httpx_response()
-            )
+    def mock_get(self, url: str, response: MockHttpResponse) -> None:
+        self.respx_mock.get(url).mock(return_value=response.httpx_response)
+
+    def mock_post(self, url: str, response: MockHttpResponse) -> None:
+        self.respx_mock.post(url).mock(return_value=response.httpx_response)
+
+    def mock_any(self, url: str, response: MockHttpResponse) -> None:
+        self.respx_mock.route(url=url).mock(return_value=response.httpx_response)
+
+    def mock_many(self, urls: list[str], response: MockHttpResponse) -> None:
+        # One flat route per URL, all sharing the response converted once
+        httpx_response = response.httpx_response
+        for url in urls:
+            self.respx_mock.route(url=url).mock(return_value=httpx_response)
+
+
+@contextmanager
+def mock_http(record: bool = True):
+    """
+    Context manager for mocking HTTP requests.
+
+    Args:
+        record: Record intercepted calls for assertions. When False, nothing
+            is recorded: respx_mock.calls stays empty and each route's
+            called, call_count and calls never update, so route-level call
+            assertions cannot be used
+    """
+    import respx
 
     with respx.mock(assert_all_called=False) as respx_mock:
+        if not record:
+            # Shadow the router's record method on this instance only
+            respx_mock.record = lambda *args, **kwargs: None
+
         yield HttpMockerImpl(respx_mock)
 
 
@@ -181,6 +242,27 @@ def mock_http():
 # ==============================================================================
 
 
+@cache
+def _scratch_root() -> str:
+    """
+    Create the per-process scratch root on first use, on tmpfs when available.
+
+    Mock directories are numbered subdirectories of this root, which is
+    removed at exit.
+    """
+    tmpfs = os.environ.get("TEST_TMPFS", "/dev/shm")
+    try:
+        root = mkdtemp(dir=tmpfs)
+    except OSError:
+        root = mkdtemp()
+
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    return root
+
+
+_scratch_ids = count()
+
+
 @dataclass
 class MockFile:
     """Represents a mocked file."""
@@ -189,22 +271,32 @@ class MockFile:
     content: str | bytes | dict | list
     is_json: bool = False
 
-    def write(self, parent_dir: Path) -> Path:
-        """Write the file to the given parent directory."""
-        full_path = parent_dir / self.path
-        full_path.parent.mkdir(parents=True, exist_ok=True)
-
+    def write(self, parent_dir: str | Path, skip_mkdir: bool = False) -> Path:
+        """
+        Write the file to the given parent directory.
+
+        Args:
+            parent_dir: Directory the file path is relative to
+            skip_mkdir: Assume the file's parent directory already exists
+        """
+        # Plain str joins avoid allocating intermediate Path objects
+        relative_path = os.fspath(self.path)
+        full_path = os.path.join(parent_dir, relative_path)
+        if not skip_mkdir and os.path.dirname(relative_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        # Encode once up front so every file is a single write call
         if self.is_json and isinstance(self.content, (dict, list)):
-            with open(full_path, "w") as f:
-                json.dump(self.content, f)
+            data = json.dumps(self.content).encode("utf-8")
         elif isinstance(self.content, bytes):
-            with open(full_path, "wb") as f:
-                f.write(self.content)
+            data = self.content
         else:
-            with open(full_path, "w") as f:
-                f.write(self.content)
+            data = self.content.encode("utf-8")
 
-        return full_path
+        with open(full_path, "wb") as f:
+            f.write(data)
+
+        return Path(full_path)
 
 
 @dataclass
@@ -214,36 +306,61 @@ class MockFileSystem:
     files: list[MockFile] = field(default_factory=list)
     directories: list[Path] = field(default_factory=list)
 
-    def create_in(self, parent_dir: Path) -> None:
+    def create_in(self, parent_dir: str | Path) -> None:
         """Create the file system structure in the given directory."""
-        # Create directories
-        for directory in self.directories:
-            full_path = parent_dir / directory
-            full_path.mkdir(parents=True, exist_ok=True)
+        parent_dir = os.fspath(parent_dir)
+
+        # Create each unique directory once; makedirs fills in any ancestors
+        needed = {os.fspath(directory) for directory in self.directories}
+        needed |= {os.path.dirname(os.fspath(file.path)) for file in self.files}
+        needed.discard("")
+
+        for directory in needed:
+            os.makedirs(os.path.join(parent_dir, directory), exist_ok=True)
 
         # Create files
         for file in self.files:
-            file.write(parent_dir)
+            file.write(parent_dir, skip_mkdir=True)
 
 
 @contextmanager
-def mock_filesystem(structure: MockFileSystem | None = None):
-    """Context manager for mocking file system operations."""
-    with TemporaryDirectory() as temp_dir:  # type: ignore
-        temp_path = Path(temp_dir)
+def mock_filesystem(structure: MockFileSystem | None = None, in_memory: bool = False):
+    """
+    Context manager for mocking file system operations.
 
-        if structure:
-            structure.create_in(temp_path)
+    Args:
+        structure: MockFileSystem structure to create
+        in_memory: Serve the file system from RAM via pyfakefs instead of
+            a real temporary directory (requires pyfakefs)
+    """
+    if in_memory:
+        from pyfakefs.fake_filesystem_unittest import Patcher
 
-        yield temp_path
+        with Patcher() as patcher:
+            temp_dir = "/mockfs"
+            patcher.fs.create_dir(temp_dir)  # type: ignore
+
+            if structure:
+                structure.create_in(temp_dir)
+
+            yield Path(temp_dir)
+    else:
+        temp_dir = os.path.join(_scratch_root(), f"t{next(_scratch_ids)}")
+        os.mkdir(temp_dir)
+
+        try:
+            if structure:
+                structure.create_in(temp_dir)
+
+            yield Path(temp_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 # ==============================================================================
 # Session Management
 # ==============================================================================
 
-from unittest.mock import patch
-
 
 @contextmanager
 def mock_session(session_data: dict[str, Any] | None = None):
@@ -253,10 +370,21 @@ def mock_session(session_data: dict[str, Any] | None = None):
     Args:
         session_data: Dictionary of session data to set
     """
+    from starlette.requests import Request
+
     session = session_data or {}
 
-    with patch("starlette.requests.Request.session", session):
+    # Swap the class attribute directly; cheaper than unittest.mock.patch
+    original = Request.__dict__.get("session")
+    Request.session = session  # type: ignore
+
+    try:
         yield session
+    finally:
+        if original is None:
+            del Request.session  # type: ignore
+        else:
+            Request.session = original  # type: ignore
 
 
 # ==============================================================================
@@ -269,19 +397,25 @@ def mock_env(variables: dict[str, str] | None = None, clear_prefix: str | None =
     """
     Context manager for mocking environment variables.
 
+    Only the keys that are set or cleared here are restored on exit. Changes
+    made inside the block to any other environment variable are not rolled
+    back; include such keys in variables to have them restored.
+
     Args:
         variables: Dictionary of environment variables to set
         clear_prefix: Clear all env vars starting with this prefix
     """
-    # Save current environment
-    env_backup = os.environ.copy()
+    # Snapshot only the variables this context touches (None if unset)
+    cleared = []
+    if clear_prefix:
+        cleared = [key for key in os.environ if key.startswith(clear_prefix)]
+    touched = set(cleared).union(variables or ())
+    snapshot = {key: os.environ.get(key) for key in touched}
 
     try:
         # Clear variables with prefix if specified
-        if clear_prefix:
-            for key in list(os.environ.keys()):
-                if key.startswith(clear_prefix):
-                    del os.environ[key]
+        for key in cleared:
+            del os.environ[key]
 
         # Set new variables
         if variables:
@@ -291,9 +425,12 @@ def mock_env(variables: dict[str, str] | None = None, clear_prefix: str | None =
         yield
 
     finally:
-        # Restore original environment
-        os.environ.clear()
-        os.environ.update(env_backup)
+        # Restore the touched variables; everything else is left alone
+        for key, value in snapshot.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
 
 
 @contextmanager
@@ -303,6 +440,7 @@ def mock_boundaries(
     env_vars: dict[str, str] | None = None,
     clear_env_prefix: str | None = None,
     session_data: dict[str, Any] | None = None,
+    intercept_http: bool = True,
 ):
     """
     Comprehensive context manager for mocking all boundary interactions.
@@ -313,11 +451,19 @@ def mock_boundaries(
         env_vars: Environment variables to set
         clear_env_prefix: Clear env vars with this prefix
         session_data: Session data to set
+        intercept_http: Intercept HTTP even without http_mocks, rejecting any
+            unmocked request; pass False to skip respx setup entirely
 
     Yields:
-        tuple: (http_mocker, filesystem_path, session)
+        tuple: (http_mocker, filesystem_path, session); http_mocker is None
+        when HTTP is not intercepted
     """
-    with mock_http() as http_mocker:
+    if http_mocks or intercept_http:
+        http_context = mock_http()
+    else:
+        http_context = nullcontext(None)
+
+    with http_context as http_mocker:
         # Set up HTTP mocks
         if http_mocks:
             for url, response in http_mocks.items():